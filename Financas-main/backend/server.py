@@ -1,15 +1,21 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from cachetools import TTLCache
+from pymongo import InsertOne, ReturnDocument
+from pymongo.errors import OperationFailure
+from bson import ObjectId
 import os
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
-import uuid
+from pydantic import BaseModel, Field, computed_field
+from typing import Annotated, List, Literal, Optional
 from datetime import datetime, timezone, date
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -17,66 +23,206 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
 db_name = os.environ.get('DB_NAME')
 if not mongo_url or not db_name:
     raise RuntimeError("As variáveis de ambiente MONGO_URL e DB_NAME devem estar definidas!")
 
-client = AsyncIOMotorClient(mongo_url)
-db = client[db_name]
+# Dashboard responses keyed by ano; cleared whenever a write changes the totals
+dashboard_cache = TTLCache(maxsize=256, ttl=30)
+
+async def migrate_legacy_documents(db: AsyncIOMotorDatabase):
+    # Amounts used to be stored as float reais
+    def cents_from(field):
+        return {"$toLong": {"$round": [{"$multiply": [f"${field}", 100]}, 0]}}
+    
+    for collection in (db.transactions, db.fixed_expenses):
+        await collection.update_many(
+            {"valor_cents": {"$exists": False}},
+            [{"$set": {"valor_cents": cents_from("valor")}}, {"$unset": "valor"}]
+        )
+    await db.alerts.update_many(
+        {"limite_mensal_cents": {"$exists": False}},
+        [{"$set": {"limite_mensal_cents": cents_from("limite_mensal")}}, {"$unset": "limite_mensal"}]
+    )
+    
+    # tipo used to be stored as the "receita"/"despesa" string
+    await db.transactions.update_many(
+        {"is_receita": {"$exists": False}, "tipo": {"$in": ["receita", "despesa"]}},
+        [{"$set": {"is_receita": {"$eq": ["$tipo", "receita"]}}}, {"$unset": "tipo"}]
+    )
+    # Any other tipo was counted in neither total; is_receita=null keeps it that
+    # way and the original tipo is left on the document for manual review
+    unknown = await db.transactions.update_many(
+        {"is_receita": {"$exists": False}},
+        {"$set": {"is_receita": None}}
+    )
+    if unknown.modified_count:
+        logger.warning(
+            "%d legacy transactions have an unrecognized tipo; stored with is_receita=null "
+            "and left out of receitas/despesas totals", unknown.modified_count
+        )
+    
+    # Documents used to carry a uuid4 "id" next to Mongo's _id
+    for collection in (db.transactions, db.fixed_expenses, db.alerts):
+        try:
+            await collection.drop_index("id_1")
+        except OperationFailure as error:
+            # Already gone: never created, or dropped by another worker booting at the same time
+            if error.code not in (26, 27):  # NamespaceNotFound, IndexNotFound
+                raise
+        await collection.update_many({"id": {"$exists": True}}, {"$unset": {"id": ""}})
+    
+    # Dates used to be stored as ISO strings; unparseable ones are left as they are
+    def date_from(field):
+        return {"$convert": {"input": f"${field}", "to": "date", "onError": f"${field}"}}
+    
+    await db.transactions.update_many(
+        {"data": {"$type": "string"}},
+        [{"$set": {"data": date_from("data")}}]
+    )
+    await db.fixed_expenses.update_many(
+        {"created_at": {"$type": "string"}},
+        [{"$set": {"created_at": date_from("created_at")}}]
+    )
+
+async def create_indexes(db: AsyncIOMotorDatabase):
+    # Compound keys end with the sort field so listings are served from the index
+    await db.transactions.create_index([("ano", 1), ("mes", 1), ("data", -1)])
+    await db.fixed_expenses.create_index([("ano", 1), ("mes", 1), ("data_vencimento", 1)])
+    
+    # Alerts used to be replaced with a non-atomic delete + insert, so a month may
+    # hold several; keep the newest one or the unique index build fails
+    duplicates = await db.alerts.aggregate([
+        {"$sort": {"_id": -1}},
+        {"$group": {"_id": {"ano": "$ano", "mes": "$mes"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}}
+    ]).to_list(None)
+    stale_ids = [alert_id for row in duplicates for alert_id in row["ids"][1:]]
+    if stale_ids:
+        await db.alerts.delete_many({"_id": {"$in": stale_ids}})
+    await db.alerts.create_index([("ano", 1), ("mes", 1)], unique=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One client per process, shared by every request through app.state
+    client = AsyncIOMotorClient(
+        mongo_url,
+        maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', 64)),
+        minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', 8)),
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        # tz_aware keeps BSON dates as UTC-aware datetimes when read back
+        tz_aware=True
+    )
+    db = client[db_name]
+    
+    # A failed migration leaves legacy documents in place but must not keep the API down
+    try:
+        await migrate_legacy_documents(db)
+    except Exception:
+        logger.exception("Legacy document migration failed; starting without it")
+    await create_indexes(db)
+    
+    app.state.db = db
+    yield
+    client.close()
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return request.app.state.db
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# $group accumulators summing receitas and despesas in the same pass. is_receita
+# is compared explicitly so legacy rows with is_receita=null count in neither.
+SPLIT_BY_TIPO = {
+    "receitas": {"$sum": {"$cond": [{"$eq": ["$is_receita", True]}, "$valor_cents", 0]}},
+    "despesas": {"$sum": {"$cond": [{"$eq": ["$is_receita", False]}, "$valor_cents", 0]}}
+}
+
+# Money is stored as integer cents; the API keeps exposing reais as floats.
+# Input amounts are bounded well inside what int64 cents can hold.
+MAX_VALOR = 1_000_000_000_000
+Valor = Annotated[float, Field(allow_inf_nan=False, ge=-MAX_VALOR, le=MAX_VALOR)]
+
+def to_cents(valor: float) -> int:
+    return int((Decimal(str(valor)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
 # Define Models
 class Transaction(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    tipo: str  # "receita" or "despesa"
-    valor: float
+    id: Optional[str] = None  # Mongo's _id, set once stored
+    # Stored instead of the "receita"/"despesa" string; None only for legacy rows
+    # whose tipo was neither
+    is_receita: Optional[bool]
+    valor_cents: int
     descricao: str
     data: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     mes: int
     ano: int
 
+    @computed_field
+    @property
+    def tipo(self) -> Optional[str]:
+        if self.is_receita is None:
+            return None
+        return "receita" if self.is_receita else "despesa"
+
+    @computed_field
+    @property
+    def valor(self) -> float:
+        return from_cents(self.valor_cents)
+
 class TransactionCreate(BaseModel):
-    tipo: str
-    valor: float
+    tipo: Literal["receita", "despesa"]
+    valor: Valor
     descricao: str
     data: Optional[datetime] = None
 
 class FixedExpense(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: Optional[str] = None  # Mongo's _id, set once stored
     nome: str
-    valor: float
+    valor_cents: int
     data_vencimento: int  # dia do mês (1-31)
     pago: bool = False
     mes: int
     ano: int
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    @computed_field
+    @property
+    def valor(self) -> float:
+        return from_cents(self.valor_cents)
+
 class FixedExpenseCreate(BaseModel):
     nome: str
-    valor: float
+    valor: Valor
     data_vencimento: int
-    mes: int
+    mes: int = Field(ge=1, le=12)
     ano: int
 
 class FixedExpenseUpdate(BaseModel):
     pago: bool
 
 class AlertConfig(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    limite_mensal: float
+    id: Optional[str] = None  # Mongo's _id, set once stored
+    limite_mensal_cents: int
     mes: int
     ano: int
     ativo: bool = True
 
+    @computed_field
+    @property
+    def limite_mensal(self) -> float:
+        return from_cents(self.limite_mensal_cents)
+
 class AlertConfigCreate(BaseModel):
-    limite_mensal: float
-    mes: int
+    limite_mensal: Valor
+    mes: int = Field(ge=1, le=12)
     ano: int
 
 class MonthlyReport(BaseModel):
@@ -85,223 +231,331 @@ class MonthlyReport(BaseModel):
     total_receitas: float
     total_despesas: float
     saldo: float
+    # One page (limit/offset) of each; the quantidade_* fields count the whole month
     transacoes: List[Transaction]
     despesas_fixas: List[FixedExpense]
+    quantidade_transacoes: int
+    quantidade_despesas_fixas: int
     total_despesas_fixas: float
     despesas_fixas_pagas: float
     despesas_fixas_pendentes: float
     limite_excedido: bool = False
     limite_configurado: Optional[float] = None
 
+# Read projections return Mongo's _id as the string "id" field. Documents read
+# back were validated when written, so read paths build models with model_construct.
+def read_projection(model):
+    fields = {name: 1 for name in model.model_fields if name != "id"}
+    return {"_id": 0, "id": {"$toString": "$_id"}, **fields}
+
+TRANSACTION_PROJECTION = read_projection(Transaction)
+FIXED_EXPENSE_PROJECTION = read_projection(FixedExpense)
+ALERT_PROJECTION = read_projection(AlertConfig)
+
 # Helper functions
-def prepare_for_mongo(data):
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-    return data
-
-def parse_from_mongo(item):
-    if isinstance(item.get('data'), str):
-        item['data'] = datetime.fromisoformat(item['data'])
-    if isinstance(item.get('created_at'), str):
-        item['created_at'] = datetime.fromisoformat(item['created_at'])
-    return item
+def parse_object_id(value: str, detail: str) -> ObjectId:
+    # Ids that can't be ObjectIds can't match any document either
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=404, detail=detail)
+    return ObjectId(value)
 
-# Transaction endpoints
-@api_router.post("/transactions", response_model=Transaction)
-async def create_transaction(transaction: TransactionCreate):
-    transaction_dict = transaction.dict()
-    
+def build_transaction(transaction: TransactionCreate) -> Transaction:
     # Set date if not provided
-    if not transaction_dict.get('data'):
-        transaction_dict['data'] = datetime.now(timezone.utc)
+    data = transaction.data or datetime.now(timezone.utc)
     
-    # Extract month and year
-    data = transaction_dict['data']
-    transaction_dict['mes'] = data.month
-    transaction_dict['ano'] = data.year
+    return Transaction(
+        is_receita=transaction.tipo == "receita",
+        valor_cents=to_cents(transaction.valor),
+        descricao=transaction.descricao,
+        data=data,
+        mes=data.month,
+        ano=data.year
+    )
+
+def rollup_dashboard(transaction_totals, fixed_expense_totals):
+    # One slot per month (index 0 unused), filled straight from the $group rows.
+    # Rows for months outside 1..12 can't be shown and are skipped.
+    receitas = [0] * 13
+    despesas_variaveis = [0] * 13
+    despesas_fixas = [0] * 13
     
-    # Create transaction object
-    trans_obj = Transaction(**transaction_dict)
+    for row in transaction_totals:
+        if isinstance(row["_id"], int) and 1 <= row["_id"] <= 12:
+            receitas[row["_id"]] += row["receitas"]
+            despesas_variaveis[row["_id"]] += row["despesas"]
     
-    # Prepare for MongoDB
-    trans_dict = prepare_for_mongo(trans_obj.dict())
+    for row in fixed_expense_totals:
+        if isinstance(row["_id"], int) and 1 <= row["_id"] <= 12:
+            despesas_fixas[row["_id"]] += row["total"]
+    
+    monthly_data = []
+    for mes in range(1, 13):
+        despesas = despesas_variaveis[mes] + despesas_fixas[mes]
+        monthly_data.append({
+            "mes": mes,
+            "receitas": from_cents(receitas[mes]),
+            "despesas": from_cents(despesas),
+            "despesas_variaveis": from_cents(despesas_variaveis[mes]),
+            "despesas_fixas": from_cents(despesas_fixas[mes]),
+            "saldo": from_cents(receitas[mes] - despesas)
+        })
+    return monthly_data
+
+# Transaction endpoints
+@api_router.post("/transactions", response_model=Transaction)
+async def create_transaction(transaction: TransactionCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
+    trans_obj = build_transaction(transaction)
     
     # Insert into database
-    await db.transactions.insert_one(trans_dict)
+    result = await db.transactions.insert_one(trans_obj.model_dump(exclude={"id", "tipo", "valor"}))
+    trans_obj.id = str(result.inserted_id)
+    dashboard_cache.clear()
     
     return trans_obj
 
+@api_router.post("/transactions/batch", response_model=List[Transaction])
+async def create_transactions(transactions: List[TransactionCreate], db: AsyncIOMotorDatabase = Depends(get_db)):
+    trans_objects = [build_transaction(transaction) for transaction in transactions]
+    if not trans_objects:
+        return []
+    
+    # Ids are assigned here so the whole batch is a single round-trip
+    operations = []
+    for trans in trans_objects:
+        document = {"_id": ObjectId(), **trans.model_dump(exclude={"id", "tipo", "valor"})}
+        trans.id = str(document["_id"])
+        operations.append(InsertOne(document))
+    
+    await db.transactions.bulk_write(operations, ordered=False)
+    dashboard_cache.clear()
+    
+    return trans_objects
+
 @api_router.get("/transactions", response_model=List[Transaction])
-async def get_transactions(mes: Optional[int] = None, ano: Optional[int] = None):
+async def get_transactions(
+    response: Response,
+    mes: Optional[int] = None,
+    ano: Optional[int] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     query = {}
     if mes and ano:
         query = {"mes": mes, "ano": ano}
     elif ano:
         query = {"ano": ano}
     
-    transactions = await db.transactions.find(query).sort("data", -1).to_list(1000)
+    cursor = db.transactions.find(query, TRANSACTION_PROJECTION).sort("data", -1).skip(offset).limit(limit)
+    transactions, total = await asyncio.gather(cursor.to_list(None), db.transactions.count_documents(query))
     
-    # Parse from MongoDB
-    parsed_transactions = [parse_from_mongo(trans) for trans in transactions]
+    # Lets clients tell whether this page is the last one
+    response.headers["X-Total-Count"] = str(total)
     
-    return [Transaction(**trans) for trans in parsed_transactions]
+    return [Transaction.model_construct(**trans) for trans in transactions]
 
 @api_router.delete("/transactions/{transaction_id}")
-async def delete_transaction(transaction_id: str):
-    result = await db.transactions.delete_one({"id": transaction_id})
+async def delete_transaction(transaction_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    object_id = parse_object_id(transaction_id, "Transaction not found")
+    result = await db.transactions.delete_one({"_id": object_id})
+    dashboard_cache.clear()
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return {"message": "Transaction deleted successfully"}
 
 # Fixed Expenses endpoints
 @api_router.post("/fixed-expenses", response_model=FixedExpense)
-async def create_fixed_expense(expense: FixedExpenseCreate):
-    expense_dict = expense.dict()
-    expense_obj = FixedExpense(**expense_dict)
-    
-    # Prepare for MongoDB
-    expense_dict = prepare_for_mongo(expense_obj.dict())
+async def create_fixed_expense(expense: FixedExpenseCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
+    expense_obj = FixedExpense(
+        **expense.model_dump(exclude={"valor"}),
+        valor_cents=to_cents(expense.valor)
+    )
     
     # Insert into database
-    await db.fixed_expenses.insert_one(expense_dict)
+    result = await db.fixed_expenses.insert_one(expense_obj.model_dump(exclude={"id", "valor"}))
+    expense_obj.id = str(result.inserted_id)
+    dashboard_cache.clear()
     
     return expense_obj
 
 @api_router.get("/fixed-expenses", response_model=List[FixedExpense])
-async def get_fixed_expenses(mes: Optional[int] = None, ano: Optional[int] = None):
+async def get_fixed_expenses(
+    response: Response,
+    mes: Optional[int] = None,
+    ano: Optional[int] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     query = {}
     if mes and ano:
         query = {"mes": mes, "ano": ano}
     elif ano:
         query = {"ano": ano}
     
-    expenses = await db.fixed_expenses.find(query).sort("data_vencimento", 1).to_list(1000)
+    cursor = db.fixed_expenses.find(query, FIXED_EXPENSE_PROJECTION).sort("data_vencimento", 1).skip(offset).limit(limit)
+    expenses, total = await asyncio.gather(cursor.to_list(None), db.fixed_expenses.count_documents(query))
     
-    # Parse from MongoDB
-    parsed_expenses = [parse_from_mongo(expense) for expense in expenses]
+    # Lets clients tell whether this page is the last one
+    response.headers["X-Total-Count"] = str(total)
     
-    return [FixedExpense(**expense) for expense in parsed_expenses]
+    return [FixedExpense.model_construct(**expense) for expense in expenses]
 
 @api_router.put("/fixed-expenses/{expense_id}", response_model=FixedExpense)
-async def update_fixed_expense(expense_id: str, update: FixedExpenseUpdate):
-    result = await db.fixed_expenses.update_one(
-        {"id": expense_id},
-        {"$set": {"pago": update.pago}}
-    )
-    
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Fixed expense not found")
+async def update_fixed_expense(expense_id: str, update: FixedExpenseUpdate, db: AsyncIOMotorDatabase = Depends(get_db)):
+    object_id = parse_object_id(expense_id, "Fixed expense not found")
     
-    # Get updated expense
-    expense = await db.fixed_expenses.find_one({"id": expense_id})
+    # Update and read back the expense in one round-trip
+    expense = await db.fixed_expenses.find_one_and_update(
+        {"_id": object_id},
+        {"$set": {"pago": update.pago}},
+        projection=FIXED_EXPENSE_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
     if expense:
-        parsed_expense = parse_from_mongo(expense)
-        return FixedExpense(**parsed_expense)
+        return FixedExpense.model_construct(**expense)
     
     raise HTTPException(status_code=404, detail="Fixed expense not found")
 
 @api_router.delete("/fixed-expenses/{expense_id}")
-async def delete_fixed_expense(expense_id: str):
-    result = await db.fixed_expenses.delete_one({"id": expense_id})
+async def delete_fixed_expense(expense_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    object_id = parse_object_id(expense_id, "Fixed expense not found")
+    result = await db.fixed_expenses.delete_one({"_id": object_id})
+    dashboard_cache.clear()
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Fixed expense not found")
     return {"message": "Fixed expense deleted successfully"}
 
 # Alert configuration endpoints
 @api_router.post("/alerts", response_model=AlertConfig)
-async def create_alert_config(alert: AlertConfigCreate):
-    alert_dict = alert.dict()
-    alert_obj = AlertConfig(**alert_dict)
-    
-    # Remove any existing alert for this month/year
-    await db.alerts.delete_many({"mes": alert.mes, "ano": alert.ano})
+async def create_alert_config(alert: AlertConfigCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
+    alert_obj = AlertConfig(
+        **alert.model_dump(exclude={"limite_mensal"}),
+        limite_mensal_cents=to_cents(alert.limite_mensal)
+    )
     
-    # Insert new alert
-    await db.alerts.insert_one(alert_obj.dict())
+    # Replace any existing alert for this month/year
+    stored = await db.alerts.find_one_and_replace(
+        {"mes": alert.mes, "ano": alert.ano},
+        alert_obj.model_dump(exclude={"id", "limite_mensal"}),
+        projection={"_id": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    alert_obj.id = str(stored["_id"])
     
     return alert_obj
 
 @api_router.get("/alerts", response_model=List[AlertConfig])
-async def get_alert_configs():
-    alerts = await db.alerts.find().to_list(1000)
-    return [AlertConfig(**alert) for alert in alerts]
+async def get_alert_configs(db: AsyncIOMotorDatabase = Depends(get_db)):
+    alerts = await db.alerts.find({}, ALERT_PROJECTION).to_list(None)
+    return [AlertConfig.model_construct(**alert) for alert in alerts]
 
 @api_router.get("/alerts/{mes}/{ano}", response_model=Optional[AlertConfig])
-async def get_alert_config(mes: int, ano: int):
-    alert = await db.alerts.find_one({"mes": mes, "ano": ano})
+async def get_alert_config(mes: int, ano: int, db: AsyncIOMotorDatabase = Depends(get_db)):
+    alert = await db.alerts.find_one({"mes": mes, "ano": ano}, ALERT_PROJECTION)
     if alert:
-        return AlertConfig(**alert)
+        return AlertConfig.model_construct(**alert)
     return None
 
 # Reports endpoint
 @api_router.get("/reports/{mes}/{ano}", response_model=MonthlyReport)
-async def get_monthly_report(mes: int, ano: int):
-    # Get transactions for the month
-    transactions = await db.transactions.find({"mes": mes, "ano": ano}).to_list(1000)
-    parsed_transactions = [parse_from_mongo(trans) for trans in transactions]
-    trans_objects = [Transaction(**trans) for trans in parsed_transactions]
+async def get_monthly_report(
+    mes: int,
+    ano: int,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    query = {"mes": mes, "ano": ano}
     
-    # Get fixed expenses for the month
-    fixed_expenses = await db.fixed_expenses.find({"mes": mes, "ano": ano}).to_list(1000)
-    parsed_fixed_expenses = [parse_from_mongo(expense) for expense in fixed_expenses]
-    fixed_expense_objects = [FixedExpense(**expense) for expense in parsed_fixed_expenses]
+    # Totals and counts are computed by MongoDB; only one page of documents is fetched
+    transactions, fixed_expenses, transaction_totals, fixed_expense_totals, alert_config = await asyncio.gather(
+        db.transactions.find(query, TRANSACTION_PROJECTION).sort("data", -1).skip(offset).limit(limit).to_list(None),
+        db.fixed_expenses.find(query, FIXED_EXPENSE_PROJECTION).sort("data_vencimento", 1).skip(offset).limit(limit).to_list(None),
+        db.transactions.aggregate([
+            {"$match": query},
+            {"$group": {"_id": None, **SPLIT_BY_TIPO, "quantidade": {"$sum": 1}}}
+        ]).to_list(None),
+        db.fixed_expenses.aggregate([
+            {"$match": query},
+            {"$group": {"_id": "$pago", "total": {"$sum": "$valor_cents"}, "quantidade": {"$sum": 1}}}
+        ]).to_list(None),
+        db.alerts.find_one({**query, "ativo": True}, {"_id": 0, "limite_mensal_cents": 1})
+    )
+    
+    trans_objects = [Transaction.model_construct(**trans) for trans in transactions]
+    fixed_expense_objects = [FixedExpense.model_construct(**expense) for expense in fixed_expenses]
     
-    # Calculate totals
-    total_receitas = sum(t.valor for t in trans_objects if t.tipo == "receita")
-    total_despesas = sum(t.valor for t in trans_objects if t.tipo == "despesa")
+    # Calculate totals (in cents)
+    totals = transaction_totals[0] if transaction_totals else {}
+    total_receitas = totals.get("receitas", 0)
+    total_despesas = totals.get("despesas", 0)
     
     # Calculate fixed expenses totals
-    total_despesas_fixas = sum(e.valor for e in fixed_expense_objects)
-    despesas_fixas_pagas = sum(e.valor for e in fixed_expense_objects if e.pago)
-    despesas_fixas_pendentes = sum(e.valor for e in fixed_expense_objects if not e.pago)
+    totals_por_pago = {row["_id"]: row["total"] for row in fixed_expense_totals}
+    despesas_fixas_pagas = totals_por_pago.get(True, 0)
+    despesas_fixas_pendentes = totals_por_pago.get(False, 0)
+    total_despesas_fixas = despesas_fixas_pagas + despesas_fixas_pendentes
+    quantidade_despesas_fixas = sum(row["quantidade"] for row in fixed_expense_totals)
     
     # Total including fixed expenses
     total_despesas_all = total_despesas + total_despesas_fixas
     saldo = total_receitas - total_despesas_all
     
     # Check alert configuration
-    alert_config = await db.alerts.find_one({"mes": mes, "ano": ano, "ativo": True})
     limite_excedido = False
     limite_configurado = None
     
     if alert_config:
-        limite_configurado = alert_config["limite_mensal"]
-        limite_excedido = total_despesas_all > limite_configurado
+        limite_configurado = from_cents(alert_config["limite_mensal_cents"])
+        limite_excedido = total_despesas_all > alert_config["limite_mensal_cents"]
     
     return MonthlyReport(
         mes=mes,
         ano=ano,
-        total_receitas=total_receitas,
-        total_despesas=total_despesas,
-        saldo=saldo,
+        total_receitas=from_cents(total_receitas),
+        total_despesas=from_cents(total_despesas),
+        saldo=from_cents(saldo),
         transacoes=trans_objects,
         despesas_fixas=fixed_expense_objects,
-        total_despesas_fixas=total_despesas_fixas,
-        despesas_fixas_pagas=despesas_fixas_pagas,
-        despesas_fixas_pendentes=despesas_fixas_pendentes,
+        quantidade_transacoes=totals.get("quantidade", 0),
+        quantidade_despesas_fixas=quantidade_despesas_fixas,
+        total_despesas_fixas=from_cents(total_despesas_fixas),
+        despesas_fixas_pagas=from_cents(despesas_fixas_pagas),
+        despesas_fixas_pendentes=from_cents(despesas_fixas_pendentes),
         limite_excedido=limite_excedido,
         limite_configurado=limite_configurado
     )
 
 # Dashboard data endpoint
 @api_router.get("/dashboard/{ano}")
-async def get_dashboard_data(ano: int):
-    monthly_data = []
+async def get_dashboard_data(ano: int, db: AsyncIOMotorDatabase = Depends(get_db)):
+    # Single lookup: an entry may expire between an "in" check and a read
+    cached = dashboard_cache.get(ano)
+    if cached is not None:
+        return cached
     
-    for mes in range(1, 13):
-        report = await get_monthly_report(mes, ano)
-        monthly_data.append({
-            "mes": mes,
-            "receitas": report.total_receitas,
-            "despesas": report.total_despesas + report.total_despesas_fixas,
-            "despesas_variaveis": report.total_despesas,
-            "despesas_fixas": report.total_despesas_fixas,
-            "saldo": report.saldo
-        })
+    # Sum the whole year server-side, one reply per collection
+    pipeline_tx = [
+        {"$match": {"ano": ano}},
+        {"$group": {"_id": "$mes", **SPLIT_BY_TIPO}}
+    ]
+    pipeline_fx = [
+        {"$match": {"ano": ano}},
+        {"$group": {"_id": "$mes", "total": {"$sum": "$valor_cents"}}}
+    ]
+    
+    transaction_totals, fixed_expense_totals = await asyncio.gather(
+        db.transactions.aggregate(pipeline_tx).to_list(None),
+        db.fixed_expenses.aggregate(pipeline_fx).to_list(None)
+    )
+    
+    monthly_data = rollup_dashboard(transaction_totals, fixed_expense_totals)
     
-    return {"ano": ano, "dados_mensais": monthly_data}
+    dashboard = {"ano": ano, "dados_mensais": monthly_data}
+    dashboard_cache[ano] = dashboard
+    return dashboard
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -312,6 +566,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 # Configure logging
@@ -320,7 +575,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -1,4 +1,5 @@
-import requests
+import asyncio
+import httpx
 import sys
 from datetime import datetime
 import json
@@ -10,25 +11,37 @@ class FinanceAPITester:
         self.tests_run = 0
         self.tests_passed = 0
         self.created_transactions = []
+        # One pooled connection set for the whole run
+        self.client = httpx.AsyncClient(
+            base_url=f"{self.api_url}/",
+            headers={'Content-Type': 'application/json'}
+        )
+
+    async def close(self):
+        await self.client.aclose()
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, params=None):
-        """Run a single API test"""
+    async def run_test(self, name, method, endpoint, expected_status, data=None, params=None, response_headers=None):
+        """Run a single API test; response_headers, if given, is filled with the response headers"""
         url = f"{self.api_url}/{endpoint}"
-        headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, params=params)
+                response = await self.client.get(endpoint, params=params)
             elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers)
+                response = await self.client.post(endpoint, json=data)
+            elif method == 'PUT':
+                response = await self.client.put(endpoint, json=data)
             elif method == 'DELETE':
-                response = requests.delete(url, headers=headers)
+                response = await self.client.delete(endpoint)
 
+            # Printed after the response so concurrent tests don't interleave
+            print(f"\n🔍 Testing {name}...")
+            print(f"   URL: {url}")
             print(f"   Status: {response.status_code}")
+            if response_headers is not None:
+                response_headers.update(response.headers)
             
             success = response.status_code == expected_status
             if success:
@@ -48,12 +61,14 @@ class FinanceAPITester:
                 return False, {}
 
         except Exception as e:
+            print(f"\n🔍 Testing {name}...")
+            print(f"   URL: {url}")
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
-    def test_create_transaction(self, tipo, valor, descricao):
+    async def test_create_transaction(self, tipo, valor, descricao):
         """Test creating a transaction"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             f"Create {tipo} Transaction",
             "POST",
             "transactions",
@@ -71,7 +86,34 @@ class FinanceAPITester:
             return response['id']
         return None
 
-    def test_get_transactions(self, mes=None, ano=None):
+    async def test_create_transactions_batch(self, items):
+        """Test creating several transactions in one batch request"""
+        success, response = await self.run_test(
+            f"Create Batch of {len(items)} Transactions",
+            "POST",
+            "transactions/batch",
+            200,
+            data=[
+                {
+                    "tipo": tipo,
+                    "valor": valor,
+                    "descricao": descricao,
+                    "data": datetime.now().isoformat()
+                }
+                for tipo, valor, descricao in items
+            ]
+        )
+        if not success:
+            return []
+        if len(response) != len(items):
+            self.tests_passed -= 1
+            print(f"❌ Failed - Expected {len(items)} transactions, got {len(response)}")
+            return []
+        ids = [trans['id'] for trans in response]
+        print(f"   Created transaction IDs: {ids}")
+        return ids
+
+    async def test_get_transactions(self, mes=None, ano=None):
         """Test getting transactions"""
         params = {}
         if mes and ano:
@@ -85,7 +127,7 @@ class FinanceAPITester:
         elif ano:
             test_name = f"Get Transactions for {ano}"
             
-        success, response = self.run_test(
+        success, response = await self.run_test(
             test_name,
             "GET",
             "transactions",
@@ -96,9 +138,57 @@ class FinanceAPITester:
             print(f"   Found {len(response)} transactions")
         return success, response
 
-    def test_delete_transaction(self, transaction_id):
+    async def test_transaction_pagination(self, mes, ano):
+        """Test that limit/offset move a one-item window over the month's transactions"""
+        first_headers = {}
+        first_ok, first_page = await self.run_test(
+            f"Get Transactions for {mes}/{ano} (limit=1, offset=0)",
+            "GET",
+            "transactions",
+            200,
+            params={"mes": mes, "ano": ano, "limit": 1, "offset": 0},
+            response_headers=first_headers
+        )
+        second_ok, second_page = await self.run_test(
+            f"Get Transactions for {mes}/{ano} (limit=1, offset=1)",
+            "GET",
+            "transactions",
+            200,
+            params={"mes": mes, "ano": ano, "limit": 1, "offset": 1}
+        )
+        if not (first_ok and second_ok):
+            return False
+
+        total = int(first_headers.get('x-total-count', -1))
+        print(f"   X-Total-Count: {total}")
+        if len(first_page) != 1 or len(second_page) != 1 or total < 2 or first_page[0]['id'] == second_page[0]['id']:
+            self.tests_passed -= 1
+            print(f"❌ Failed - Expected two distinct one-item pages, got {first_page} and {second_page}")
+            return False
+        return True
+
+    async def test_monthly_report_page(self, mes, ano):
+        """Test that the report pages its embedded lists but counts the whole month"""
+        success, response = await self.run_test(
+            f"Get Monthly Report for {mes}/{ano} (limit=1)",
+            "GET",
+            f"reports/{mes}/{ano}",
+            200,
+            params={"limit": 1}
+        )
+        if not success:
+            return False
+
+        print(f"   Transações na página: {len(response.get('transacoes', []))} de {response.get('quantidade_transacoes')}")
+        if len(response.get('transacoes', [])) > 1 or response.get('quantidade_transacoes', 0) < 2:
+            self.tests_passed -= 1
+            print(f"❌ Failed - Expected at most 1 embedded transaction out of several")
+            return False
+        return True
+
+    async def test_delete_transaction(self, transaction_id):
         """Test deleting a transaction"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Delete Transaction",
             "DELETE",
             f"transactions/{transaction_id}",
@@ -106,9 +196,64 @@ class FinanceAPITester:
         )
         return success
 
-    def test_create_alert(self, limite_mensal, mes, ano):
+    async def test_delete_malformed_id(self):
+        """Test that an id that is not an ObjectId is reported as not found"""
+        success, response = await self.run_test(
+            "Delete Transaction with Malformed ID",
+            "DELETE",
+            "transactions/not-an-object-id",
+            404
+        )
+        return success
+
+    async def test_create_fixed_expense(self, nome, valor, data_vencimento, mes, ano):
+        """Test creating a fixed expense"""
+        success, response = await self.run_test(
+            "Create Fixed Expense",
+            "POST",
+            "fixed-expenses",
+            200,
+            data={
+                "nome": nome,
+                "valor": valor,
+                "data_vencimento": data_vencimento,
+                "mes": mes,
+                "ano": ano
+            }
+        )
+        if success and 'id' in response:
+            print(f"   Created fixed expense ID: {response['id']}")
+            return response['id']
+        return None
+
+    async def test_toggle_fixed_expense_paid(self, expense_id, pago):
+        """Test marking a fixed expense as paid/unpaid"""
+        success, response = await self.run_test(
+            f"Set Fixed Expense pago={pago}",
+            "PUT",
+            f"fixed-expenses/{expense_id}",
+            200,
+            data={"pago": pago}
+        )
+        if success and (response.get('id') != expense_id or response.get('pago') != pago):
+            self.tests_passed -= 1
+            print(f"❌ Failed - Expected id={expense_id} pago={pago}, got {response}")
+            return False
+        return success
+
+    async def test_delete_fixed_expense(self, expense_id):
+        """Test deleting a fixed expense"""
+        success, response = await self.run_test(
+            "Delete Fixed Expense",
+            "DELETE",
+            f"fixed-expenses/{expense_id}",
+            200
+        )
+        return success
+
+    async def test_create_alert(self, limite_mensal, mes, ano):
         """Test creating an alert configuration"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Create Alert Configuration",
             "POST",
             "alerts",
@@ -121,9 +266,9 @@ class FinanceAPITester:
         )
         return success, response
 
-    def test_get_alerts(self):
+    async def test_get_alerts(self):
         """Test getting all alert configurations"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get All Alerts",
             "GET",
             "alerts",
@@ -133,9 +278,9 @@ class FinanceAPITester:
             print(f"   Found {len(response)} alert configurations")
         return success, response
 
-    def test_get_alert_by_month(self, mes, ano):
+    async def test_get_alert_by_month(self, mes, ano):
         """Test getting alert configuration for specific month"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             f"Get Alert for {mes}/{ano}",
             "GET",
             f"alerts/{mes}/{ano}",
@@ -143,9 +288,9 @@ class FinanceAPITester:
         )
         return success, response
 
-    def test_monthly_report(self, mes, ano):
+    async def test_monthly_report(self, mes, ano):
         """Test getting monthly report"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             f"Get Monthly Report for {mes}/{ano}",
             "GET",
             f"reports/{mes}/{ano}",
@@ -158,9 +303,9 @@ class FinanceAPITester:
             print(f"   Limite excedido: {response.get('limite_excedido', False)}")
         return success, response
 
-    def test_dashboard_data(self, ano):
+    async def test_dashboard_data(self, ano):
         """Test getting dashboard data for a year"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             f"Get Dashboard Data for {ano}",
             "GET",
             f"dashboard/{ano}",
@@ -171,48 +316,119 @@ class FinanceAPITester:
             print(f"   Monthly data points: {len(response.get('dados_mensais', []))}")
         return success, response
 
-def main():
-    print("🚀 Starting Finance API Tests")
-    print("=" * 50)
-    
-    tester = FinanceAPITester()
+    async def test_dashboard_cache_invalidation(self, mes, ano):
+        """Test that writes clear the cached dashboard for the year"""
+        def month_totals(dashboard):
+            for item in dashboard.get('dados_mensais', []):
+                if item.get('mes') == mes:
+                    return item.get('receitas', 0), item.get('despesas', 0)
+            return None
+
+        before_ok, before = await self.test_dashboard_data(ano)
+        receita_id = await self.test_create_transaction("receita", 123.45, "Teste cache receita")
+        despesa_id = await self.test_create_transaction("despesa", 67.89, "Teste cache despesa")
+        after_ok, after = await self.test_dashboard_data(ano)
+
+        passed = False
+        if before_ok and after_ok and receita_id and despesa_id:
+            before_totals, after_totals = month_totals(before), month_totals(after)
+            print(f"   {mes}/{ano} receitas/despesas: {before_totals} -> {after_totals}")
+            passed = (
+                before_totals is not None and after_totals is not None
+                and round(after_totals[0] - before_totals[0], 2) == 123.45
+                and round(after_totals[1] - before_totals[1], 2) == 67.89
+            )
+            if not passed:
+                self.tests_passed -= 1
+                print("❌ Failed - Dashboard still served the totals cached before the writes")
+
+        for trans_id in (receita_id, despesa_id):
+            if trans_id:
+                self.created_transactions.remove(trans_id)
+                await self.test_delete_transaction(trans_id)
+        return passed
+
+async def run_tests(tester):
     current_month = datetime.now().month
     current_year = datetime.now().year
 
     # Test 1: Create sample transactions
     print("\n📝 Testing Transaction Creation")
-    receita_id = tester.test_create_transaction("receita", 3500.0, "Salário")
-    freelance_id = tester.test_create_transaction("receita", 800.0, "Freelance")
-    aluguel_id = tester.test_create_transaction("despesa", 1200.0, "Aluguel")
-    supermercado_id = tester.test_create_transaction("despesa", 400.0, "Supermercado")
-    transporte_id = tester.test_create_transaction("despesa", 200.0, "Transporte")
+    await asyncio.gather(
+        tester.test_create_transaction("receita", 3500.0, "Salário"),
+        tester.test_create_transaction("receita", 800.0, "Freelance"),
+        tester.test_create_transaction("despesa", 1200.0, "Aluguel"),
+        tester.test_create_transaction("despesa", 400.0, "Supermercado"),
+        tester.test_create_transaction("despesa", 200.0, "Transporte")
+    )
+
+    # Test 1b: Batch creation, then delete what the batch returned
+    print("\n📦 Testing Batch Transaction Creation")
+    await tester.test_create_transactions_batch([])
+    batch_ids = await tester.test_create_transactions_batch([
+        ("receita", 150.0, "Reembolso"),
+        ("despesa", 59.9, "Internet"),
+        ("despesa", 35.5, "Farmácia")
+    ])
+    await asyncio.gather(*[tester.test_delete_transaction(trans_id) for trans_id in batch_ids])
+
+    # Test 1c: Fixed expense ids round-trip through PUT, malformed ids are 404
+    print("\n🔑 Testing Record IDs")
+    await tester.test_delete_malformed_id()
+    expense_id = await tester.test_create_fixed_expense("Academia", 99.9, 10, current_month, current_year)
+    if expense_id:
+        await tester.test_toggle_fixed_expense_paid(expense_id, True)
+        await tester.test_toggle_fixed_expense_paid(expense_id, False)
+        await tester.test_delete_fixed_expense(expense_id)
 
     # Test 2: Get transactions
     print("\n📋 Testing Transaction Retrieval")
-    tester.test_get_transactions()  # All transactions
-    tester.test_get_transactions(mes=current_month, ano=current_year)  # Current month
-    tester.test_get_transactions(ano=current_year)  # Current year
+    await asyncio.gather(
+        tester.test_get_transactions(),  # All transactions
+        tester.test_get_transactions(mes=current_month, ano=current_year),  # Current month
+        tester.test_get_transactions(ano=current_year)  # Current year
+    )
+
+    # Test 2b: Pagination windows over the current month
+    print("\n📄 Testing Pagination")
+    await tester.test_transaction_pagination(current_month, current_year)
+    await tester.test_monthly_report_page(current_month, current_year)
 
     # Test 3: Create alert configuration
     print("\n🚨 Testing Alert Configuration")
-    tester.test_create_alert(1000.0, current_month, current_year)
-    tester.test_get_alerts()
-    tester.test_get_alert_by_month(current_month, current_year)
+    await tester.test_create_alert(1000.0, current_month, current_year)
+    await asyncio.gather(
+        tester.test_get_alerts(),
+        tester.test_get_alert_by_month(current_month, current_year)
+    )
 
-    # Test 4: Get monthly report (should show limit exceeded)
-    print("\n📊 Testing Monthly Report")
-    tester.test_monthly_report(current_month, current_year)
+    # Test 4 and 5: Get monthly report (should show limit exceeded) and dashboard data
+    print("\n📊 Testing Monthly Report and Dashboard Data")
+    await asyncio.gather(
+        tester.test_monthly_report(current_month, current_year),
+        tester.test_dashboard_data(current_year)
+    )
 
-    # Test 5: Get dashboard data
-    print("\n📈 Testing Dashboard Data")
-    tester.test_dashboard_data(current_year)
+    # Test 5b: The dashboard read above is cached; writes must refresh it
+    print("\n♻️ Testing Dashboard Cache Invalidation")
+    await tester.test_dashboard_cache_invalidation(current_month, current_year)
 
     # Test 6: Delete one transaction
     print("\n🗑️ Testing Transaction Deletion")
     if tester.created_transactions:
-        tester.test_delete_transaction(tester.created_transactions[0])
+        await tester.test_delete_transaction(tester.created_transactions[0])
         # Verify deletion by getting transactions again
-        tester.test_get_transactions(mes=current_month, ano=current_year)
+        await tester.test_get_transactions(mes=current_month, ano=current_year)
+
+async def main():
+    print("🚀 Starting Finance API Tests")
+    print("=" * 50)
+    
+    tester = FinanceAPITester()
+    try:
+        await run_tests(tester)
+    finally:
+        await tester.close()
 
     # Print final results
     print("\n" + "=" * 50)
@@ -226,4 +442,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
@@ -17,6 +17,20 @@ import { BarChart, Bar, LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, L
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const PAGE_SIZE = 1000;
+
+// Listings are paginated; keep requesting pages until X-Total-Count is reached
+const fetchAllPages = async (url, params) => {
+  const items = [];
+  for (;;) {
+    const response = await axios.get(url, { params: { ...params, limit: PAGE_SIZE, offset: items.length } });
+    items.push(...response.data);
+    const total = parseInt(response.headers['x-total-count'], 10);
+    if (response.data.length === 0 || Number.isNaN(total) || items.length >= total) {
+      return items;
+    }
+  }
+};
 
 const months = [
   'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
@@ -57,14 +71,14 @@ function App() {
   const loadMonthlyData = async () => {
     try {
       setLoading(true);
-      const [transactionsRes, fixedExpensesRes, reportRes] = await Promise.all([
-        axios.get(`${API}/transactions?mes=${currentMonth}&ano=${currentYear}`),
-        axios.get(`${API}/fixed-expenses?mes=${currentMonth}&ano=${currentYear}`),
-        axios.get(`${API}/reports/${currentMonth}/${currentYear}`)
+      const [transactionsData, fixedExpensesData, reportRes] = await Promise.all([
+        fetchAllPages(`${API}/transactions`, { mes: currentMonth, ano: currentYear }),
+        fetchAllPages(`${API}/fixed-expenses`, { mes: currentMonth, ano: currentYear }),
+        axios.get(`${API}/reports/${currentMonth}/${currentYear}`, { params: { limit: 1 } })
       ]);
       
-      setTransactions(transactionsRes.data);
-      setFixedExpenses(fixedExpensesRes.data);
+      setTransactions(transactionsData);
+      setFixedExpenses(fixedExpensesData);
       setMonthlyReport(reportRes.data);
     } catch (error) {
       console.error('Erro ao carregar dados:', error);